@@ -1,8 +1,92 @@
 import os
-import json
+import re
+import mmap
+import orjson
+import functools
+import zstandard as zstd
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 from pathlib import Path
-from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor
+from lxml import etree
+
+LD_JSON_RE = re.compile(rb'<script[^>]*type="application/ld\+json"[^>]*>(.*?)</script>', re.S)
+PARSE_CHUNK_SIZE = 32 * 1024
+# Pages are saved zstd-compressed by the scraper; plain HTML is still accepted
+HTML_SUFFIXES = (".html.zst", ".html")
+COLUMNS = (
+    "position",
+    "@id",
+    "name",
+    "url",
+    "description",
+    "numberOfRooms",
+    "floorSize.value",
+    "address.addressCountry",
+    "address.addressLocality",
+    "address.streetAddress",
+    "telephone",
+)
+
+def _items_to_frame(items: list) -> pd.DataFrame:
+    """Flatten ld+json listing items into a DataFrame with COLUMNS."""
+    columns = {name: [] for name in COLUMNS}
+    for record in items:
+        item = record.get("item") or {}
+        floor_size = item.get("floorSize") or {}
+        address = item.get("address") or {}
+        columns["position"].append(record.get("position"))
+        columns["@id"].append(item.get("@id"))
+        columns["name"].append(item.get("name"))
+        columns["url"].append(item.get("url"))
+        columns["description"].append(item.get("description"))
+        columns["numberOfRooms"].append(item.get("numberOfRooms"))
+        columns["floorSize.value"].append(floor_size.get("value"))
+        columns["address.addressCountry"].append(address.get("addressCountry"))
+        columns["address.addressLocality"].append(address.get("addressLocality"))
+        columns["address.streetAddress"].append(address.get("streetAddress"))
+        columns["telephone"].append(item.get("telephone"))
+    # dtypes are inferred like json_normalize did; scraped values are not reliably numeric
+    return pd.DataFrame(columns)
+
+@functools.lru_cache(maxsize=None)
+def _decompressor(dict_prefix: str = None, dict_id: int = 0) -> zstd.ZstdDecompressor:
+    """
+    Return this process's decompressor for frames written with dictionary `dict_id` (0 means none).
+    Dictionaries are kept as {dict_prefix}_{dict_id}.dict, so pages written before a retrain stay readable.
+    """
+    if not dict_id:
+        return zstd.ZstdDecompressor()
+    for path in (f"{dict_prefix}_{dict_id}.dict", f"{dict_prefix}.dict"):
+        try:
+            with open(path, "rb") as f:
+                zstd_dict = zstd.ZstdCompressionDict(f.read())
+        except FileNotFoundError:
+            continue
+        if zstd_dict.dict_id() == dict_id:
+            return zstd.ZstdDecompressor(dict_data=zstd_dict)
+    raise zstd.ZstdError(f"No zstd dictionary with id {dict_id} found for {dict_prefix}")
+
+def _parse_one(file_path: str, dict_prefix: str = None) -> pd.DataFrame:
+    """Return the ld+json listing items of a single HTML file as a DataFrame."""
+    json_data = None
+    with open(file_path, "rb") as f:
+        if file_path.endswith(".zst"):
+            data = f.read()
+            try:
+                decompressor = _decompressor(dict_prefix, zstd.get_frame_parameters(data).dict_id)
+                json_data = Extractor.html_to_json(decompressor.decompress(data))
+            except zstd.ZstdError as e:
+                # One unreadable page must not abort the whole extraction
+                print(f"Skipping {file_path}: {e}")
+        # mmap cannot map empty files
+        elif os.fstat(f.fileno()).st_size:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as html_content:
+                json_data = Extractor.html_to_json(html_content)
+    items = json_data.get("@graph", {}).get("itemListElement", []) if json_data else []
+    return _items_to_frame(items)
 
 class Extractor:
     def __init__(self, website: str):
@@ -10,54 +94,74 @@ class Extractor:
         self.base_dir = Path(__file__).resolve().parent.parent
         self.input_dir = self.base_dir / "data" / "raw_html" / f"raw_{self.website}"
         self.output_dir = self.base_dir / "data" / "extracted_links" / f"extracted_{self.website}"
+        # zstd dictionaries the scraper compressed pages with, if any were trained
+        self.zstd_dict_prefix = self.base_dir / "config" / f"{self.website.lower()}_zstd"
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
-    def html_to_json(self, html_content: str):
-        """Extract JSON from HTML content."""
-        soup = BeautifulSoup(html_content, "html.parser")
-        script_tag = soup.find("script", type="application/ld+json")
-        if script_tag and script_tag.string:
+    @staticmethod
+    def html_to_json(html_content):
+        """Extract JSON from HTML content (str, bytes or a bytes-like mmap)."""
+        if isinstance(html_content, str):
+            html_content = html_content.encode("utf-8")
+        match = LD_JSON_RE.search(html_content)
+        if match:
             try:
-                return json.loads(script_tag.string)
-            except json.JSONDecodeError:
+                return orjson.loads(match.group(1))
+            except orjson.JSONDecodeError:
                 pass
+        # Fall back to a real parser for markup the regex does not cover,
+        # stopping as soon as the first ld+json script has been closed
+        parser = etree.HTMLPullParser(events=("end",), tag="script", encoding="utf-8")
+        for start in range(0, len(html_content) + PARSE_CHUNK_SIZE, PARSE_CHUNK_SIZE):
+            if start < len(html_content):
+                parser.feed(html_content[start:start + PARSE_CHUNK_SIZE])
+            else:
+                # close() emits the end event of a script left open at the end of the document
+                try:
+                    parser.close()
+                except etree.LxmlError:
+                    pass
+            for _, element in parser.read_events():
+                if element.get("type") == "application/ld+json" and element.text:
+                    try:
+                        return orjson.loads(element.text)
+                    except orjson.JSONDecodeError:
+                        return None
         return None
 
     def extract_links(self):
         """Extract links from all HTML files and merge them into a DataFrame."""
-        all_data = []
-        
-        for file_path in self.input_dir.glob("*.html"):
-            with file_path.open("r", encoding="utf-8") as f:
-                html_content = f.read()
-            
-            json_data = self.html_to_json(html_content)
-            if json_data:
-                graph_data = json_data.get("@graph", {}).get("itemListElement", [])
-                if graph_data:
-                    all_data.extend(graph_data)
-
-        if all_data:
-            self.df_merged = pd.json_normalize(
-                all_data,
-                meta=[
-                    "position",
-                    ["item", "name"],
-                    ["item", "url"],
-                    ["item", "description"],
-                    ["item", "numberOfRooms"],
-                    ["item", "floorSize", "value"],
-                    ["item", "address", "addressCountry"],
-                    ["item", "address", "addressLocality"],
-                    ["item", "address", "streetAddress"],
-                    ["item", "telephone"]
-                ]
+        frames = []
+
+        with os.scandir(self.input_dir) as entries:
+            html_files = [entry.path for entry in entries if entry.name.endswith(HTML_SUFFIXES) and entry.is_file()]
+
+        parse = functools.partial(_parse_one, dict_prefix=str(self.zstd_dict_prefix))
+        with ProcessPoolExecutor() as executor:
+            for frame in executor.map(parse, html_files, chunksize=16):
+                if not frame.empty:
+                    frames.append(frame)
+
+        self.df_merged = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLUMNS)
+
+    def _arrow_table(self) -> pa.Table:
+        """Convert the merged DataFrame to an Arrow table, storing mixed-type columns as strings."""
+        try:
+            return pa.Table.from_pandas(self.df_merged, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Columns mixing types (e.g. numeric and text room counts) cannot be converted as-is
+            object_columns = self.df_merged.select_dtypes(include="object").columns
+            return pa.Table.from_pandas(
+                self.df_merged.astype({column: "string" for column in object_columns}),
+                preserve_index=False
             )
-            self.df_merged.columns = self.df_merged.columns.str.replace(r"^item\.", "", regex=True)
-        else:
-            self.df_merged = pd.DataFrame()
 
     def save_csv(self):
         """Save extracted data to a CSV file."""
         if not self.df_merged.empty:
-            self.df_merged.to_csv(self.output_dir / f"extracted_{self.website}.csv", index=False)
+            pacsv.write_csv(self._arrow_table(), str(self.output_dir / f"extracted_{self.website}.csv"))
+
+    def save_parquet(self):
+        """Save extracted data to a Parquet file."""
+        if not self.df_merged.empty:
+            pq.write_table(self._arrow_table(), str(self.output_dir / f"extracted_{self.website}.parquet"))
@@ -1,54 +1,172 @@
 import os
+import copy
+import re
 import time
+import asyncio
 import random
-import json
-import hashlib
+import orjson
+import xxhash
+import atexit
 import logging
+import logging.handlers
+import queue
+import zstandard as zstd
+import aiohttp
 from pathlib import Path
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from utils import URLsHandler
-from multiprocessing import Process, Event, Manager
+from utils import URLsHandler, split_evenly
+from threading import Event, Lock
+from concurrent.futures import ThreadPoolExecutor, Future
 import signal
 import warnings
-from typing import List, Tuple, Any, Dict
+from typing import List, Tuple, Any, Dict, Callable
 import datetime
 warnings.filterwarnings("ignore")
 
-# Global variables to be set before starting batch processing
-GLOBAL_PROCESSES = None
+# Phrases served instead of the listing when the site wants a captcha solved
+BLOCK_PHRASES = (
+    "İnsan olduğunuz doğrulanıyor. Bu işlem birkaç saniye sürebilir.",
+    "Devam etmek için doğrulama yapmalısınız",
+)
+BLOCK_RE = re.compile("|".join(map(re.escape, BLOCK_PHRASES)))
+# Listing data the extractor needs; plain-HTTP pages without it are left to Selenium
+LD_JSON_RE = re.compile(r'<script[^>]*type="application/ld\+json"')
+
+# Headers for the plain-HTTP fetch pass, matching the browser's language settings
+HTTP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36",
+    "Accept-Language": "tr-TR,tr;q=0.9,en;q=0.8",
+}
+
+# Global variable to be set before starting batch processing
 GLOBAL_STOP_EVENT = None
 
 def global_signal_handler(sig, frame):
     logger.warning("Signal received. Sending stop signal to all workers.")
     if GLOBAL_STOP_EVENT is not None:
         GLOBAL_STOP_EVENT.set()
-    if GLOBAL_PROCESSES is not None:
-        for p in GLOBAL_PROCESSES:
-            if p.is_alive():
-                p.terminate()
 
 # --- Setup logging ---
 os.makedirs("logs", exist_ok=True)
 log_time = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
 log_filename = f"logs/scraper_{log_time}.log"
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(log_filename),
-        logging.StreamHandler()
-    ]
-)
+log_formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+log_handlers = [logging.FileHandler(log_filename), logging.StreamHandler()]
+for log_handler in log_handlers:
+    log_handler.setFormatter(log_formatter)
+# Worker threads only enqueue records; a listener thread does the formatting and I/O
+log_queue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(log_queue, *log_handlers)
+log_listener.start()
+atexit.register(log_listener.stop)
+# Attached directly: basicConfig would give the QueueHandler its own format, which prepare() bakes into the message
+root_logger = logging.getLogger()
+root_logger.setLevel(logging.INFO)
+root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
 logger = logging.getLogger(__name__)
 
+class WakingEvent(Event):
+    """
+    Event that also sets a shared wake-up event, so the main thread can block on
+    a single wait() for several kinds of worker signal.
+    """
+    def __init__(self, wake_event: Event):
+        super().__init__()
+        self._wake_event = wake_event
+
+    def set(self) -> None:
+        super().set()
+        self._wake_event.set()
+
+class CaptchaEvent(WakingEvent):
+    """
+    Captcha flag shared by workers. Setting it clears `resumed`, so workers block
+    in wait_resumed() until the main thread calls resume() after the manual solve.
+    """
+    def __init__(self, wake_event: Event):
+        super().__init__(wake_event)
+        self.resumed = Event()
+        self.resumed.set()
+
+    def set(self) -> None:
+        # Clear before the flag becomes visible so no worker sees it set while still resumed
+        self.resumed.clear()
+        super().set()
+
+    def resume(self) -> None:
+        """Clear the captcha flag and release paused workers."""
+        self.clear()
+        self.resumed.set()
+
+    def wait_resumed(self, shutdown_event: Event = None) -> bool:
+        """
+        Block until resume() is called. Returns False if shutdown_event is set first.
+        """
+        while not self.resumed.wait(timeout=1):
+            if shutdown_event is not None and shutdown_event.is_set():
+                return False
+        return True
+
+class SeleniumPool:
+    """
+    Pool of live Chrome WebDrivers shared by worker threads.
+    Workers check a driver out with acquire() and hand it back with release(),
+    so browsers are reused across batches instead of being relaunched.
+    """
+    def __init__(self, create_driver: Callable[[], webdriver.Chrome]):
+        """
+        Args:
+            create_driver (Callable): Launches a new WebDriver when no idle one is available.
+        """
+        self._create_driver = create_driver
+        self._lock = Lock()
+        self._drivers: List[webdriver.Chrome] = []
+        self._idle: List[webdriver.Chrome] = []
+
+    def acquire(self) -> webdriver.Chrome:
+        """Check out an idle WebDriver, launching a new one if none is available."""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        # Launch outside the lock so workers starting together bring up their browsers in parallel
+        driver = self._create_driver()
+        with self._lock:
+            self._drivers.append(driver)
+        return driver
+
+    def release(self, driver: webdriver.Chrome) -> None:
+        """Return a healthy WebDriver to the pool."""
+        with self._lock:
+            if driver in self._drivers and driver not in self._idle:
+                self._idle.append(driver)
+
+    def discard(self, driver: webdriver.Chrome) -> None:
+        """Quit a broken WebDriver and drop it from the pool."""
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+            if driver in self._idle:
+                self._idle.remove(driver)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        """Quit every WebDriver launched by the pool."""
+        with self._lock:
+            drivers, self._drivers, self._idle = self._drivers, [], []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+
 class Scraper:
     """
-    Web scraper for real estate websites using Selenium and multiprocessing.
+    Web scraper for real estate websites using Selenium and worker threads.
     """
     def __init__(self, website: str, base_link: bool = True):
         """
@@ -68,6 +186,15 @@ class Scraper:
         self.cooldown_interval = self.config.getint('Scraper', 'COOLDOWN_INTERVAL', fallback=10)
         self.max_retries = self.config.getint('Scraper', 'MAX_RETRIES', fallback=5)
         self.session_timeout = self.config.getint('Scraper', 'SESSION_TIMEOUT', fallback=300)
+        # Skip loading non-essential page assets; stylesheets stay on by default so captchas remain solvable
+        self.disable_images = self.config.getboolean('Scraper', 'DISABLE_IMAGES', fallback=True)
+        self.disable_stylesheets = self.config.getboolean('Scraper', 'DISABLE_STYLESHEETS', fallback=False)
+        # "eager" returns from driver.get() at DOMContentLoaded instead of waiting for every asset
+        self.page_load_strategy = self.config.get('Scraper', 'PAGE_LOAD_STRATEGY', fallback="eager")
+        # Concurrent plain-HTTP requests tried before falling back to Selenium (0 disables)
+        self.http_concurrency = self.config.getint('Scraper', 'HTTP_CONCURRENCY', fallback=8)
+        # Jittered exponential backoff delays per retry attempt, redrawn for each worker
+        self._backoff = self._jittered_backoff()
         # Always run in non-headless mode for manual captcha solving
         self.headless = False
         self.session_start_time = time.time()
@@ -78,6 +205,14 @@ class Scraper:
         self.batch_size = None
         self.number_of_rotate_sesion = 35
         self.shared_cookies = None # Initialize shared_cookies
+        # Optional per-site dictionary trained on earlier pages, see train_compression_dict.
+        # Every trained dictionary is also kept by id so pages compressed with older ones stay readable.
+        self.zstd_dict_path = self.base_dir / "config" / f"{self.website.lower()}_zstd.dict"
+        self._zstd_dict = zstd.ZstdCompressionDict(self.zstd_dict_path.read_bytes()) if self.zstd_dict_path.exists() else None
+        self._compressor = self._new_compressor()
+        self.driver_pool = SeleniumPool(self._create_driver)
+        self._meta_file = None  # Opened on the first saved page
+        self._failed_file = None  # Opened on the first failed page
         logger.info(f"Initialized scraper for '{self.website}' with base_link={self.base_link}, headless={self.headless}")
 
     def _load_config(self) -> None:
@@ -106,13 +241,25 @@ class Scraper:
         self.chrome_options.add_argument("--disable-gpu")
         self.chrome_options.add_argument("--window-size=1920,1080")
         self.chrome_options.add_argument("--lang=tr-TR")
+        self.chrome_options.page_load_strategy = self.page_load_strategy
+        prefs = {"profile.default_content_setting_values.notifications": 2}
+        if self.disable_images:
+            prefs["profile.managed_default_content_settings.images"] = 2
+            self.chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        if self.disable_stylesheets:
+            prefs["profile.managed_default_content_settings.stylesheets"] = 2
+        self.chrome_options.add_experimental_option("prefs", prefs)
+
+    def _create_driver(self) -> webdriver.Chrome:
+        """Launch a new Chrome WebDriver."""
+        self._setup_chrome_options()
+        self.service = Service()
+        return webdriver.Chrome(service=self.service, options=self.chrome_options)
 
     def _initialize_scraper(self) -> None:
-        """Initialize the Selenium WebDriver."""
+        """Initialize the Selenium WebDriver by checking one out of the driver pool."""
         try:
-            self._setup_chrome_options()
-            self.service = Service()
-            self.driver = webdriver.Chrome(service=self.service, options=self.chrome_options)
+            self.driver = self.driver_pool.acquire()
             logger.info("Chrome WebDriver initialized.")
         except Exception as e:
             logger.error(f"Failed to initialize WebDriver: {e}")
@@ -121,38 +268,28 @@ class Scraper:
         """Validate the HTML content of a page. If captcha detected, signal main process for manual intervention."""
         if not html_content or len(html_content.strip()) < 500:
             return False, "Content too short or empty"
-        block_phrases = [
-            "İnsan olduğunuz doğrulanıyor. Bu işlem birkaç saniye sürebilir.",
-            "Devam etmek için doğrulama yapmalısınız"
-        ]
-        for phrase in block_phrases:
-            if phrase in html_content:
-                logger.warning(f"Bot/captcha detected on {url}: '{phrase}' found in HTML.")
-                if captcha_event is not None:
-                    captcha_event.set()
-                return False, f"Bot/captcha verification detected: '{phrase}'"
+        match = BLOCK_RE.search(html_content)
+        if match:
+            phrase = match.group(0)
+            logger.warning(f"Bot/captcha detected on {url}: '{phrase}' found in HTML.")
+            if captcha_event is not None:
+                captcha_event.set()
+            return False, f"Bot/captcha verification detected: '{phrase}'"
         return True, "Valid content"
 
     def _make_request(self, url: str, attempt: int = 0, captcha_event: Event = None) -> Tuple[Any, bool]:
         """
         Request a page and return its HTML content if valid.
-        Uses WebDriverWait for dynamic page load.
+        driver.get() returns once the page reaches the configured load strategy.
         """
         try:
-            logger.info(f"Requesting: {url} (Attempt {attempt + 1})")
+            logger.debug(f"Requesting: {url} (Attempt {attempt + 1})")
             self.driver.get(url)
-            try:
-                WebDriverWait(self.driver, 15).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "body"))
-                )
-                logger.debug(f"Page loaded for {url}")
-            except Exception as wait_exc:
-                logger.warning(f"Timeout waiting for page to load: {url} ({wait_exc})")
             html_content = self.driver.page_source
             is_valid, message = self._validate_html_content(html_content, url, captcha_event)
             if is_valid:
                 self.successful_requests += 1
-                logger.info(f"Page valid: {url}")
+                logger.debug(f"Page valid: {url}")
                 return html_content, True
             else:
                 logger.warning(f"Invalid content: {url} — Reason: {message}")
@@ -162,24 +299,40 @@ class Scraper:
             return None, False
 
     def _rotate_session(self) -> None:
-        """Rotate the Selenium session (re-initialize the driver)."""
-        logger.info("Closing current session")
-        self.driver.quit()
+        """
+        Rotate the Selenium session by clearing cookies and storage.
+        The browser is kept alive so its keep-alive connections are reused;
+        it is only relaunched if clearing the session fails.
+        """
         logger.info("Rotating session...")
-        self._initialize_scraper()
+        try:
+            self.driver.delete_all_cookies()
+            self.driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except Exception as e:
+            logger.warning(f"Failed to clear session, restarting browser: {e}")
+            self.driver_pool.discard(self.driver)
+            self._initialize_scraper()
         self.session_data = {}
         delay = random.uniform(0.5, 2)
         logger.info(f"Sleeping {delay:.1f}s during session rotation...")
         time.sleep(delay)
 
-    def _save_page(self, html_content: str, page_number: int, url: str) -> None:
-        """Save the HTML content and metadata for a page."""
+    def _save_page(self, html_content: str, page_number: int, url: str) -> bool:
+        """
+        Save the HTML content of a page and append its metadata to metadata.jsonl.
+        Returns:
+            bool: True if the page was written; callers only mark it fetched then.
+        """
         try:
-            content_hash = hashlib.md5(html_content.encode()).hexdigest()[:8]
-            filename = f"{self.website}_page_{page_number}_{content_hash}.html"
+            data = html_content.encode("utf-8")
+            content_hash = xxhash.xxh3_64_hexdigest(data)[:8]
+            stem = f"{self.website}_page_{page_number}_{content_hash}"
+            filename = f"{stem}.html.zst"
             file_path = self.output_dir / filename
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(html_content)
+            # Write to a temp name and rename so a crash never leaves a truncated page behind
+            tmp_path = self.output_dir / f"{filename}.tmp"
+            tmp_path.write_bytes(self._compressor.compress(data))
+            os.replace(tmp_path, file_path)
             metadata = {
                 'page_number': page_number,
                 'url': url,
@@ -188,44 +341,234 @@ class Scraper:
                 'content_hash': content_hash,
                 'website': self.website
             }
-            metadata_file = file_path.with_suffix('.json')
-            with open(metadata_file, "w", encoding="utf-8") as f:
-                json.dump(metadata, f, indent=2)
+            if self._meta_file is None:
+                self._meta_file = open(self.output_dir / "metadata.jsonl", "ab", buffering=64 * 1024)
+                # Written out whenever fetched marks are, so no page is marked fetched without its metadata row
+                self.urls_handler.add_flush_hook(self._meta_file.flush)
+            self._meta_file.write(orjson.dumps(metadata, option=orjson.OPT_APPEND_NEWLINE))
             logger.info(f"Saved page {page_number} to {filename}")
+            return True
         except Exception as e:
             logger.error(f"Failed to save page {page_number} ({url}): {e}")
+            return False
 
     def _save_failed_page(self, page_number: int, url: str) -> None:
-        """Save information about a failed page scrape."""
+        """Append information about a failed page scrape to failed_pages.jsonl."""
         try:
-            failed_file = self.output_dir / "failed_pages.json"
+            if self._failed_file is None:
+                self._failed_file = open(self.output_dir / "failed_pages.jsonl", "ab", buffering=64 * 1024)
             failed_data = {
                 'page_number': page_number,
                 'url': url,
                 'timestamp': time.time(),
                 'website': self.website
             }
-            existing_failed = []
-            if failed_file.exists():
-                try:
-                    with open(failed_file, 'r', encoding='utf-8') as f:
-                        existing_failed = json.load(f)
-                except Exception:
-                    existing_failed = []
-            existing_failed.append(failed_data)
-            with open(failed_file, 'w', encoding='utf-8') as f:
-                json.dump(existing_failed, f, indent=2)
+            self._failed_file.write(orjson.dumps(failed_data, option=orjson.OPT_APPEND_NEWLINE))
             logger.warning(f"Failed page info saved for page {page_number}: {url}")
         except Exception as e:
             logger.error(f"Failed to save failed page info for page {page_number} ({url}): {e}")
 
-    def _fetch_and_save_pages(self, batch_url_list: List[List[Any]], worker_id: int = 0, captcha_event: Event = None, status_dict=None, progress_dict=None, start_index=0, shutdown_event: Event = None, shared_cookies: list = None) -> None:
+    def _close_output_files(self) -> None:
+        """Flush and close the metadata and failed pages logs if they were opened."""
+        if self._meta_file is not None:
+            self.urls_handler.remove_flush_hook(self._meta_file.flush)
+            self._meta_file.close()
+            self._meta_file = None
+        if self._failed_file is not None:
+            self._failed_file.close()
+            self._failed_file = None
+
+    async def _fetch_http(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore, blocked: asyncio.Event, writer: ThreadPoolExecutor, url: str, page_number: int, stop_event: Event = None) -> bool:
+        """
+        Fetch a single page over plain HTTP and save it if valid.
+        Saving runs on the single `writer` thread so disk writes and state updates stay serialized.
+        Sets `blocked` when the site answers with a captcha or a blocking status.
+        Gives up without requesting or saving once `stop_event` is set.
+        Returns:
+            bool: True if the page was saved and marked as fetched.
+        """
+        async with semaphore:
+            if blocked.is_set() or (stop_event is not None and stop_event.is_set()):
+                return False
+            try:
+                async with session.get(url) as response:
+                    status = response.status
+                    charset = response.charset or "utf-8"
+                    body = await response.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"HTTP request failed for {url}: {e}")
+                return False
+        # Wrong or missing charsets must not abort the pass; fall back to lenient UTF-8
+        try:
+            html_content = body.decode(charset, errors="replace")
+        except LookupError:
+            html_content = body.decode("utf-8", errors="replace")
+        if status in (403, 429) or BLOCK_RE.search(html_content):
+            logger.warning(f"HTTP request blocked on {url} (status {status}). Leaving remaining pages to Selenium.")
+            blocked.set()
+            return False
+        is_valid, message = self._validate_html_content(html_content, url)
+        if status != 200 or not is_valid:
+            logger.warning(f"Invalid HTTP content: {url} (status {status}) — Reason: {message}")
+            return False
+        if not LD_JSON_RE.search(html_content):
+            # Likely a JS shell that only renders listings in a browser
+            logger.warning(f"No ld+json data in HTTP response for {url}. Leaving it to Selenium.")
+            return False
+        if stop_event is not None and stop_event.is_set():
+            return False
+        loop = asyncio.get_running_loop()
+        try:
+            if not await loop.run_in_executor(writer, self._save_page, html_content, page_number, url):
+                return False
+            await loop.run_in_executor(writer, self.urls_handler.mark_url_fetched, url)
+        except Exception as e:
+            logger.error(f"Failed to record HTTP page {page_number} ({url}): {e}")
+            return False
+        self.successful_requests += 1
+        return True
+
+    async def _fetch_all_http(self, pages: List[Tuple[int, str]], stop_event: Event = None) -> None:
+        """
+        Fetch pages concurrently over plain HTTP before any browser is started.
+        Valid pages are saved and marked as fetched; anything else stays unfetched
+        for the Selenium workers. Stops early once the site starts blocking.
+        Args:
+            pages (List[Tuple[int, str]]): (idx, url) of the unfetched pages; idx is used as the page number.
+            stop_event (Event): Event to signal shutdown.
+        """
+        semaphore = asyncio.Semaphore(self.http_concurrency)
+        blocked = asyncio.Event()
+        chunk_size = self.http_concurrency * 32
+        saved = 0
+        connector = aiohttp.TCPConnector(limit=self.http_concurrency, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=15)
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            async with aiohttp.ClientSession(headers=HTTP_HEADERS, connector=connector, timeout=timeout) as session:
+                for start in range(0, len(pages), chunk_size):
+                    if blocked.is_set() or (stop_event is not None and stop_event.is_set()):
+                        break
+                    results = await asyncio.gather(*(
+                        self._fetch_http(session, semaphore, blocked, writer, url, page_number, stop_event)
+                        for page_number, url in pages[start:start + chunk_size]
+                    ), return_exceptions=True)
+                    for result in results:
+                        if isinstance(result, BaseException):
+                            logger.error(f"HTTP fetch raised: {result!r}")
+                    saved += sum(result is True for result in results)
+        self._close_output_files()
+        logger.info(f"HTTP pass saved {saved} of {len(pages)} pages; the rest fall back to Selenium.")
+
+    def _new_compressor(self) -> zstd.ZstdCompressor:
+        """Return a zstd compressor for saved pages, using the site dictionary when one exists."""
+        if self._zstd_dict is None:
+            return zstd.ZstdCompressor(level=3)
+        return zstd.ZstdCompressor(level=3, dict_data=self._zstd_dict)
+
+    def _archived_dict_path(self, dict_id: int) -> Path:
+        """Path a trained dictionary is kept under, keyed by its id."""
+        return self.zstd_dict_path.with_name(f"{self.website.lower()}_zstd_{dict_id}.dict")
+
+    def _decompress_saved(self, data: bytes) -> bytes:
+        """Decompress a saved page with whichever dictionary its frame was written with."""
+        dict_id = zstd.get_frame_parameters(data).dict_id
+        if not dict_id:
+            return zstd.ZstdDecompressor().decompress(data)
+        if self._zstd_dict is not None and self._zstd_dict.dict_id() == dict_id:
+            zstd_dict = self._zstd_dict
+        else:
+            zstd_dict = zstd.ZstdCompressionDict(self._archived_dict_path(dict_id).read_bytes())
+        return zstd.ZstdDecompressor(dict_data=zstd_dict).decompress(data)
+
+    def train_compression_dict(self, dict_size: int = 100_000, max_samples: int = 2000, max_sample_bytes: int = 100 * 1024 * 1024) -> None:
+        """
+        Train a zstd dictionary on pages already saved for this site and store it in config/.
+        Pages saved afterwards are compressed with it; extract_links picks it up for decompression.
+        Previous dictionaries are kept by id, so pages compressed with them stay readable.
+        Args:
+            dict_size (int): Target dictionary size in bytes.
+            max_samples (int): Maximum number of saved pages to sample.
+            max_sample_bytes (int): Maximum total decompressed size of the samples.
+        """
+        samples = []
+        sample_bytes = 0
+        with os.scandir(self.output_dir) as entries:
+            for entry in entries:
+                if len(samples) >= max_samples or sample_bytes >= max_sample_bytes:
+                    break
+                if entry.name.endswith(".html.zst"):
+                    with open(entry.path, "rb") as f:
+                        try:
+                            sample = self._decompress_saved(f.read())
+                        except (zstd.ZstdError, OSError) as e:
+                            logger.warning(f"Skipping {entry.name} for dictionary training: {e}")
+                            continue
+                    samples.append(sample)
+                    sample_bytes += len(sample)
+        if not samples:
+            logger.warning(f"No saved pages in {self.output_dir} to train a dictionary on.")
+            return
+        zstd_dict = zstd.train_dictionary(dict_size, samples)
+        self.zstd_dict_path.parent.mkdir(parents=True, exist_ok=True)
+        if self._zstd_dict is not None:
+            # Older dictionaries trained before they were archived by id
+            previous_path = self._archived_dict_path(self._zstd_dict.dict_id())
+            if not previous_path.exists():
+                previous_path.write_bytes(self._zstd_dict.as_bytes())
+        self._archived_dict_path(zstd_dict.dict_id()).write_bytes(zstd_dict.as_bytes())
+        self.zstd_dict_path.write_bytes(zstd_dict.as_bytes())
+        self._zstd_dict = zstd_dict
+        self._compressor = self._new_compressor()
+        logger.info(f"Trained {len(zstd_dict.as_bytes())}-byte dictionary on {len(samples)} pages: {self.zstd_dict_path}")
+
+    def _jittered_backoff(self) -> Tuple[float, ...]:
+        """
+        Build the retry delay table: 2 ** attempt seconds scaled by a random factor in [0.5, 1.5].
+        """
+        return tuple(2 ** attempt * random.uniform(0.5, 1.5) for attempt in range(self.max_retries))
+
+    def _spawn_worker(self) -> "Scraper":
+        """
+        Return a shallow copy of this scraper for a worker thread.
+        Config, URL handler and driver pool are shared; per-worker state is reset.
+        """
+        worker = copy.copy(self)
+        worker.successful_requests = 0
+        worker.failed_requests = 0
+        worker.session_data = {}
+        worker._meta_file = None
+        worker._failed_file = None
+        # Compressors must not be used from several threads at once
+        worker._compressor = worker._new_compressor()
+        # Fresh jitter so workers that fail together do not retry in lockstep
+        worker._backoff = worker._jittered_backoff()
+        return worker
+
+    def _pause_for_captcha(self, worker_id: int, captcha_event: CaptchaEvent, status_dict=None, shutdown_event: Event = None) -> bool:
+        """
+        Block this worker, browser left open, until the main thread resumes after the manual captcha solve.
+        Returns:
+            bool: False if shutdown was requested while paused.
+        """
+        logger.warning(f"[Worker {worker_id}] Captcha detected. Pausing until it is solved.")
+        if status_dict is not None:
+            status_dict[worker_id] = "paused for captcha"
+        if not captcha_event.wait_resumed(shutdown_event):
+            logger.info(f"[Worker {worker_id}] Shutdown requested while paused for captcha.")
+            return False
+        logger.info(f"[Worker {worker_id}] Captcha solved. Resuming work with the same browser session.")
+        if status_dict is not None:
+            status_dict[worker_id] = "resumed after captcha"
+        return True
+
+    def _fetch_and_save_pages(self, batch_pages: List[Tuple[int, str]], worker_id: int = 0, captcha_event: CaptchaEvent = None, status_dict=None, progress_dict=None, start_index=0, shutdown_event: Event = None, shared_cookies: list = None) -> None:
         """
         Fetch and save a batch of pages. Each worker gets a unique batch.
         Args:
-            batch_url_list (List[List[Any]]): List of [url, is_last_page, page_number].
-            worker_id (int): Worker process ID for logging.
-            captcha_event (Event): Event to signal captcha detection.
+            batch_pages (List[Tuple[int, str]]): Slice of the unfetched (idx, url) pages assigned to this worker;
+                idx is the page's state database index and is used as its page number.
+            worker_id (int): Worker ID for logging.
+            captcha_event (CaptchaEvent): Set on captcha detection; workers pause until it is resumed.
             status_dict (dict): Shared dict for worker status.
             progress_dict (dict): Shared dict for worker progress (current index).
             start_index (int): Index to start from in the batch.
@@ -233,13 +576,17 @@ class Scraper:
             shared_cookies (list): Cookies to inject into the session after captcha solve.
         """
         logger.info(f"[Worker {worker_id}] Started.")
+        if shutdown_event is not None and shutdown_event.is_set():
+            # Don't launch a browser for a worker that was only queued when the stop came
+            logger.info(f"[Worker {worker_id}] Shutdown event set before start. Exiting.")
+            return
         if status_dict is not None:
             status_dict[worker_id] = "started"
         self._initialize_scraper()
         # Inject cookies if provided
         if shared_cookies:
             # Visit the domain first to set cookies
-            test_url = batch_url_list[start_index][0] if batch_url_list and len(batch_url_list[start_index]) > 0 else None
+            test_url = batch_pages[start_index][1] if start_index < len(batch_pages) else None
             if test_url:
                 self.driver.get(test_url)
                 for cookie in shared_cookies:
@@ -249,30 +596,18 @@ class Scraper:
                         logger.warning(f"[Worker {worker_id}] Failed to add cookie: {cookie} ({e})")
                 self.driver.refresh()
         try:
-            logger.info(f"[Worker {worker_id}] Entering main processing loop with {len(batch_url_list)} URLs.")
-            for index in range(start_index, len(batch_url_list)):
+            logger.info(f"[Worker {worker_id}] Entering main processing loop with {len(batch_pages)} URLs.")
+            for index in range(start_index, len(batch_pages)):
                 if shutdown_event is not None and shutdown_event.is_set():
-                    logger.info(f"[Worker {worker_id}] Shutdown event set. Closing driver and exiting.")
-                    self.driver.quit()
+                    logger.info(f"[Worker {worker_id}] Shutdown event set. Releasing driver and exiting.")
                     return
-                url, is_last_page, page_number = batch_url_list[index]
+                page_number, url = batch_pages[index]
                 # UPDATE PROGRESS
                 if progress_dict is not None:
                     progress_dict[worker_id] = index
-                if is_last_page:
-                    logger.info(f"[Worker {worker_id} PID {os.getpid()}] Last page reached.")
-                    if status_dict is not None:
-                        status_dict[worker_id] = "finished"
-                    break
                 if captcha_event is not None and captcha_event.is_set():
-                    logger.warning(f"[Worker {worker_id}] Captcha event set. Pausing until cleared.")
-                    logger.info(f"[Worker {worker_id}] Waiting for captcha to be solved (waiting for event to clear)...")
-                    if status_dict is not None:
-                        status_dict[worker_id] = "paused for captcha"
-                    captcha_event.wait()
-                    logger.info(f"[Worker {worker_id}] Captcha event cleared by main process. Resuming work.")
-                    if status_dict is not None:
-                        status_dict[worker_id] = "resumed after captcha"
+                    if not self._pause_for_captcha(worker_id, captcha_event, status_dict, shutdown_event):
+                        return
                 # Only rotate session after the first batch
                 if index != 0 and index % self.number_of_rotate_sesion == 0:
                     self._rotate_session()
@@ -283,33 +618,23 @@ class Scraper:
                 for attempt in range(self.max_retries):
                     html_content, is_valid = self._make_request(url, attempt, captcha_event)
                     if html_content and is_valid:
-                        self._save_page(html_content, page_number, url)
-                        # Mark URL as fetched in the state JSON (multiprocessing-safe)
-                        self.urls_handler.mark_url_fetched(url)
-                        success = True
+                        # A write error is not fixed by fetching again, so stop retrying either way
+                        success = self._save_page(html_content, page_number, url)
+                        if success:
+                            # Mark URL as fetched; marks are buffered and written to the SQLite pages table in batches
+                            self.urls_handler.mark_url_fetched(url)
                         break
                     else:
                         if attempt < self.max_retries - 1:
-                            delay = (2 ** attempt) * random.uniform(0.5, 1.5)
+                            delay = self._backoff[attempt]
                             logger.info(f"[Worker {worker_id}] Retrying in {delay:.1f}s (attempt {attempt+1}/{self.max_retries})...")
                             time.sleep(delay)
-                            if attempt > 1:
-                                self._rotate_session()
                         if captcha_event is not None and captcha_event.is_set():
-                            logger.warning(f"[Worker {worker_id}] Captcha event set during retry. Closing browser session and pausing until cleared.")
-                            try:
-                                self.driver.quit()
-                                logger.info(f"[Worker {worker_id}] WebDriver closed due to captcha event (retry).")
-                            except Exception:
-                                pass
-                            logger.info(f"[Worker {worker_id}] Waiting for captcha to be solved (waiting for event to clear)...")
-                            if status_dict is not None:
-                                status_dict[worker_id] = "paused for captcha"
-                            captcha_event.wait()
-                            logger.info(f"[Worker {worker_id}] Captcha event cleared by main process. Re-initializing browser and resuming work.")
-                            if status_dict is not None:
-                                status_dict[worker_id] = "resumed after captcha"
-                            self._initialize_scraper()
+                            # Keep the browser and its cookies: the captcha is solved in it and the cookies carry the clearance
+                            if not self._pause_for_captcha(worker_id, captcha_event, status_dict, shutdown_event):
+                                return
+                        elif attempt > 1 and attempt < self.max_retries - 1:
+                            self._rotate_session()
                 if not success:
                     self.failed_requests += 1
                     logger.error(f"[Worker {worker_id}] Failed to scrape page {page_number} after {self.max_retries} attempts.")
@@ -320,10 +645,11 @@ class Scraper:
             logger.error(f"[Worker {worker_id}] Exception: {e}", exc_info=True)
         finally:
             try:
-                self.driver.quit()
-                logger.info(f"[Worker {worker_id}] WebDriver closed.")
+                self.driver_pool.release(self.driver)
+                logger.info(f"[Worker {worker_id}] WebDriver released.")
             except Exception:
                 pass
+            self._close_output_files()
         total = self.successful_requests + self.failed_requests
         success_rate = (self.successful_requests / total * 100) if total else 0
         logger.info(f"[Worker {worker_id}] Scraping finished. Successful: {self.successful_requests}, Failed: {self.failed_requests}, Success rate: {success_rate:.2f}%")
@@ -332,26 +658,28 @@ class Scraper:
 
     def _batch_processing(self, num_workers: int = 5) -> None:
         """
-        Launch multiple worker processes, each with a unique batch of URLs.
+        Fetch what can be fetched over plain HTTP, then run multiple worker
+        threads, each with a unique batch of the remaining URLs.
+        Workers share one pool of browsers, which is closed when processing ends.
         Handles graceful shutdown on KeyboardInterrupt or signals.
-        Pauses all workers if a captcha is detected, allows manual solve, then resumes scraping from the last failed URL.
+        Pauses all workers if a captcha is detected, allows manual solve, then resumes the paused workers on the same browser sessions.
         Args:
-            num_workers (int): Number of worker processes to launch.
+            num_workers (int): Number of worker threads to run.
         """
-        global GLOBAL_PROCESSES, GLOBAL_STOP_EVENT
+        global GLOBAL_STOP_EVENT
         stop_event = Event()
-        captcha_event = Event()
-        manager = Manager()
-        status_dict = manager.dict()
-        progress_dict = manager.dict()  # NEW: Track progress
-        processes: List[Process] = []
-        last_failed_url = None
-        all_batches = self.urls_handler.get_all_batches(num_workers, self.batch_size)
+        # Set whenever a worker finishes or detects a captcha
+        wake_event = Event()
+        captcha_event = CaptchaEvent(wake_event)
+        status_dict: Dict[int, str] = {}
+        progress_dict: Dict[int, int] = {}
+        futures: List[Future] = []
+        executor = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix="worker")
+        all_batches: List[List[str]] = []
         start_indices = [0] * num_workers  # NEW: Track start index for each worker
         # shared_cookies = None # This line is removed as per the edit hint
 
-        # Set globals for the signal handler
-        GLOBAL_PROCESSES = processes
+        # Set global for the signal handler
         GLOBAL_STOP_EVENT = stop_event
 
         # Register the global signal handler
@@ -359,65 +687,60 @@ class Scraper:
         signal.signal(signal.SIGTERM, global_signal_handler)
 
         try:
+            if self.http_concurrency > 0:
+                unfetched_pages = self.urls_handler.get_unfetched_urls()
+                if unfetched_pages:
+                    asyncio.run(self._fetch_all_http(unfetched_pages, stop_event))
             while not stop_event.is_set():
-                logger.info(f"Launching {num_workers} worker processes...")
-                processes.clear()
+                logger.info(f"Launching {num_workers} workers...")
+                futures.clear()
                 # Get all unfetched URLs and split among workers
-                unfetched_urls = self.urls_handler.get_unfetched_urls()
-                if not unfetched_urls:
+                unfetched_pages = self.urls_handler.get_unfetched_urls()
+                if not unfetched_pages:
                     logger.info("No unfetched URLs left. Exiting batch processing loop.")
                     break
-                # Split unfetched_urls into batches for each worker
-                batch_size = len(unfetched_urls) // num_workers + (1 if len(unfetched_urls) % num_workers else 0)
-                all_batches = [
-                    [[url, False, idx] for idx, url in enumerate(unfetched_urls[i*batch_size:(i+1)*batch_size])]
-                    for i in range(num_workers)
-                ]
+                # Split unfetched_pages into contiguous slices, one per worker, differing in size by at most one
+                all_batches = [unfetched_pages[start:end] for start, end in split_evenly(len(unfetched_pages), num_workers)]
                 start_indices = [0] * num_workers
-                for i, batch_url_list in enumerate(all_batches):
-                    if not batch_url_list or start_indices[i] >= len(batch_url_list):
+                for i, batch_pages in enumerate(all_batches):
+                    if not batch_pages or start_indices[i] >= len(batch_pages):
                         logger.info(f"No more batches to process. Worker {i} exiting.")
                         continue
-                    logger.info(f"Starting worker {i} with {len(batch_url_list) - start_indices[i]} URLs (from index {start_indices[i]}).")
+                    logger.info(f"Starting worker {i} with {len(batch_pages) - start_indices[i]} URLs (from index {start_indices[i]}).")
                     status_dict[i] = "starting"
                     progress_dict[i] = start_indices[i]
-                    scraper_args = (self.website, self.base_link)
-                    p = Process(
-                        target=worker_fetch_and_save_pages,
-                        args=(scraper_args, batch_url_list, i, captcha_event, status_dict, progress_dict, start_indices[i], stop_event)
+                    future = executor.submit(
+                        worker_fetch_and_save_pages,
+                        self._spawn_worker(), batch_pages, i, captcha_event, status_dict, progress_dict, start_indices[i], stop_event
                     )
-                    p.start()
-                    processes.append(p)
+                    future.add_done_callback(lambda _: wake_event.set())
+                    futures.append(future)
                 all_done = all(
-                    not batch_url_list or start_indices[i] >= len(batch_url_list)
-                    for i, batch_url_list in enumerate(all_batches)
+                    not batch_pages or start_indices[i] >= len(batch_pages)
+                    for i, batch_pages in enumerate(all_batches)
                 )
                 if all_done:
                     logger.info("All batches processed. Exiting batch processing loop.")
                     break
-                # Monitor worker status
-                while any(p.is_alive() for p in processes):
-                    logger.info(f"Worker status: {dict(status_dict)}")
+                # Block until a worker finishes or reports a captcha, logging status while idle
+                while any(not f.done() for f in futures) and not stop_event.is_set():
+                    if not wake_event.wait(timeout=30):
+                        logger.info(f"Worker status: {dict(status_dict)}")
+                        continue
+                    wake_event.clear()
                     if captcha_event.is_set():
+                        # Workers stay paused with their browsers open until resume() below
                         logger.warning("Captcha detected by a worker. Pausing all workers for manual intervention.")
-                        last_failed_url = self.urls_handler.current_url
-                        # Do NOT terminate workers; they will pause and resume after captcha is solved
-                        break
-                    time.sleep(2)
-                if captcha_event.is_set():
-                    # Save progress for each worker
-                    for i in range(num_workers):
-                        start_indices[i] = progress_dict.get(i, start_indices[i])
-                    # Prompt user to solve captcha in any open browser window
-                    print("\n[CAPTCHA DETECTED]")
-                    print("Please solve the captcha in any open browser window, then press Enter here to continue...")
-                    input()
-                    captcha_event.clear()
-                    logger.info("Resuming scraping after manual captcha solve.")
-                    sleep_time = random.uniform(1, 3)
-                    logger.info(f"Sleeping {sleep_time:.1f}s before resuming workers after captcha solve.")
-                    time.sleep(sleep_time)
-                    continue
+                        self.urls_handler.flush_marks()
+                        # Prompt user to solve captcha in any open browser window
+                        print("\n[CAPTCHA DETECTED]")
+                        print("Please solve the captcha in any open browser window, then press Enter here to continue...")
+                        input()
+                        sleep_time = random.uniform(1, 3)
+                        logger.info(f"Sleeping {sleep_time:.1f}s before resuming workers after captcha solve.")
+                        time.sleep(sleep_time)
+                        logger.info("Resuming scraping after manual captcha solve.")
+                        captcha_event.resume()
                 logger.info(f"Worker status at batch end: {dict(status_dict)}")
                 logger.info("Batch completed. Preparing next batch...")
                 for i in range(num_workers):
@@ -426,20 +749,18 @@ class Scraper:
         except KeyboardInterrupt:
             logger.warning("KeyboardInterrupt received. Sending stop signal.")
             stop_event.set()
-            for p in processes:
-                if p.is_alive():
-                    p.terminate()
         finally:
-            for p in processes:
-                if p.is_alive():
-                    p.terminate()
-            logger.info("All worker processes terminated.")
+            # Threads cannot be killed; signal them and wait for their current page to finish
+            stop_event.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.urls_handler.flush_marks()
+            self.driver_pool.close()
+            logger.info("All workers stopped and browsers closed.")
 
-def worker_fetch_and_save_pages(scraper_args, batch_url_list, worker_id, captcha_event, status_dict, progress_dict, start_index, shutdown_event):
-    logger.info(f"[Worker {worker_id}] Worker function started with {len(batch_url_list)} URLs.")
+def worker_fetch_and_save_pages(scraper, batch_pages, worker_id, captcha_event, status_dict, progress_dict, start_index, shutdown_event):
+    logger.info(f"[Worker {worker_id}] Worker function started with {len(batch_pages)} URLs.")
     try:
-        scraper = Scraper(*scraper_args)
-        scraper._fetch_and_save_pages(batch_url_list, worker_id, captcha_event, status_dict, progress_dict, start_index, shutdown_event)
+        scraper._fetch_and_save_pages(batch_pages, worker_id, captcha_event, status_dict, progress_dict, start_index, shutdown_event)
     except Exception as e:
         logger.error(f"[Worker {worker_id}] Exception: {e}", exc_info=True)
 
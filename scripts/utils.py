@@ -1,13 +1,61 @@
+import atexit
 import configparser
-import pandas as pd
+import functools
+import csv
+import pyarrow.parquet as pq
 from pathlib import Path
-from typing import Optional, Any, Tuple, List
-import json
+from typing import Optional, Any, Tuple, List, Callable
+import orjson
 import os
+import sqlite3
+import threading
+import weakref
 from datetime import datetime
-from filelock import FileLock
 import time
 
+@functools.lru_cache(maxsize=1)
+def _read_config(config_path: str) -> configparser.RawConfigParser:
+    """
+    Parse the config file once per process; every URLsHandler shares the result.
+    Raises:
+        ValueError: If the config file is empty or not loaded properly.
+    """
+    config = configparser.RawConfigParser()
+    config.read(config_path, encoding="utf-8")
+    if not config.sections():
+        raise ValueError("Config file is empty or not loaded properly!")
+    print(f"Loaded config from: {config_path}")
+    return config
+
+# Live handlers, held weakly so registering for the exit flush does not keep them alive
+_handlers: "weakref.WeakSet[URLsHandler]" = weakref.WeakSet()
+
+def _flush_all_marks():
+    """
+    Write the buffered marks of every live URLsHandler at interpreter exit.
+    """
+    for handler in list(_handlers):
+        try:
+            handler.flush_marks()
+        except Exception as e:
+            print(f"Failed to flush fetched marks for {handler.website}: {e}")
+
+atexit.register(_flush_all_marks)
+
+def split_evenly(total: int, parts: int) -> List[Tuple[int, int]]:
+    """
+    Split range(total) into at most `parts` contiguous [start, end) ranges whose sizes differ by at most one.
+    """
+    size, remainder = divmod(total, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        end = start + size + (1 if i < remainder else 0)
+        if end > start:
+            ranges.append((start, end))
+        start = end
+    return ranges
+
 class URLsHandler:
     """
     Handles URL and page batching logic for scraping different real estate websites.
@@ -23,18 +71,32 @@ class URLsHandler:
         self.base_link = base_link
         self.config = self._load_config()
         self.base_url = self._get_config_value("URLs", f"{self.website}_BASE_URL")
+        # Split the template once so page URLs are built by concatenation instead of str.format
+        self._url_prefix, _, self._url_suffix = self.base_url.partition("{page_number}")
         self.increment = self._get_config_value("Pages", f"{self.website}_INCREMENTS", value_type=int)
         self.last_base_page_number = self._get_config_value("Pages", f"{self.website}_LAST_BASE_PAGE_NUMBER", value_type=int)
         self.last_page_number = self._get_config_value("Pages", f"{self.website}_LAST_PAGE_NUMBER", value_type=int)
         self.base_dir = Path(__file__).resolve().parent.parent
-        self.csv_path = "" if base_link else self.base_dir / "data" / "extracted_links" / f"extracted_{self.website.lower()}" / f"extracted_{self.website.lower()}.csv"
-        self.df = pd.DataFrame() if base_link else pd.read_csv(self.csv_path)
-        self.current_url = self._get_config_value("URLs", f"{self.website}_FIRST_URL") if base_link else self.df["@id"].iloc[0]
-        self.current_page_number = 0
+        extracted_dir = self.base_dir / "data" / "extracted_links" / f"extracted_{self.website.lower()}"
+        self.csv_path = "" if base_link else extracted_dir / f"extracted_{self.website.lower()}.csv"
+        self.parquet_path = "" if base_link else extracted_dir / f"extracted_{self.website.lower()}.parquet"
+        # Resume position; the state file is only read on first access, see _resolve_state
+        self._current_url: Optional[str] = None
+        self._current_page_number: Optional[int] = None
+        self._state_loaded = False
+        # Fetched marks buffered per write to the state database (config: Scraper.MARK_BATCH_SIZE)
+        self.mark_batch_size = self._get_config_value("Scraper", "MARK_BATCH_SIZE", value_type=int, default=50)
+        self._pending_marks: List[Tuple[str, str]] = []  # (url, timestamp) not yet written to the state database
+        self._pending_marks_lock = threading.Lock()
+        self._flush_hooks: List[Callable[[], None]] = []  # Run before marks are written, see add_flush_hook
         self.state_dir = self.base_dir / "state"
         self.state_file = self.state_dir / f"{self.website.lower()}_state.json"
-        self._ensure_state_dir()
-        self.load_state()  # Load state if exists
+        self.state_db = self.state_dir / f"{self.website.lower()}_state.db"
+        self._local = threading.local()  # One SQLite connection per thread
+        self._last_page_cache: Optional[Tuple[int, str]] = None
+        self._cursor = 0  # Index get_next_page_url resumes searching from
+        self._cursor_lock = threading.Lock()
+        _handlers.add(self)  # Buffered marks are flushed at exit, see _flush_all_marks
 
     def _load_config(self) -> configparser.RawConfigParser:
         """
@@ -49,12 +111,76 @@ class URLsHandler:
         config_path = base_dir / "config" / "config.ini"
         if not config_path.exists():
             raise FileNotFoundError(f"Config file not found: {config_path}")
-        config = configparser.RawConfigParser()
-        config.read(config_path, encoding="utf-8")
-        if not config.sections():
-            raise ValueError("Config file is empty or not loaded properly!")
-        print(f"Loaded config from: {config_path}")
-        return config
+        return _read_config(str(config_path))
+
+    @functools.cached_property
+    def ids(self) -> List[str]:
+        """
+        Extracted link URLs ('@id' column), loaded on first use so workers that
+        only receive URL batches never read them.
+        """
+        return [] if self.base_link else self._load_extracted_links()
+
+    def _resolve_state(self):
+        """
+        Load the saved resume state the first time it is needed.
+        """
+        if not self._state_loaded:
+            self.load_state()
+
+    @property
+    def current_url(self) -> str:
+        """
+        The current URL, defaulting to the first page (or first extracted link)
+        when no saved state has set it.
+        """
+        self._resolve_state()
+        if self._current_url is None:
+            if self.base_link:
+                self._current_url = self._get_config_value("URLs", f"{self.website}_FIRST_URL")
+            else:
+                self._current_url = self.ids[0]
+        return self._current_url
+
+    @current_url.setter
+    def current_url(self, value: str):
+        self._resolve_state()
+        self._current_url = value
+
+    @property
+    def current_page_number(self) -> int:
+        """
+        The current page number, 0 when no saved state has set it.
+        """
+        self._resolve_state()
+        return self._current_page_number or 0
+
+    @current_page_number.setter
+    def current_page_number(self, value: int):
+        self._resolve_state()
+        self._current_page_number = value
+
+    def _load_extracted_links(self) -> List[str]:
+        """
+        Load the '@id' column of the extracted links.
+        Reads the Parquet output when it is at least as new as the CSV, so a stale
+        Parquet file from an earlier run never overrides a fresh save_csv; otherwise streams the CSV.
+        Returns:
+            List[str]: The extracted link URLs in file order.
+        """
+        try:
+            parquet_mtime = self.parquet_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            parquet_mtime = None
+        if parquet_mtime is not None:
+            try:
+                csv_is_newer = self.csv_path.stat().st_mtime_ns > parquet_mtime
+            except FileNotFoundError:
+                csv_is_newer = False
+            if not csv_is_newer:
+                return pq.read_table(self.parquet_path, columns=["@id"]).column("@id").to_pylist()
+        with open(self.csv_path, newline="", encoding="utf-8") as f:
+            return [row["@id"] for row in csv.DictReader(f)]
 
     def _get_config_value(self, section: str, key: str, value_type: type = str, default: Optional[Any] = None) -> Any:
         """
@@ -82,8 +208,62 @@ class URLsHandler:
         """
         Ensure the state directory exists.
         """
-        if not self.state_dir.exists():
-            self.state_dir.mkdir(parents=True, exist_ok=True)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Return this thread's connection to the state database, opening it on first use.
+        WAL mode lets worker threads and processes write concurrently without an external lock.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self._ensure_state_dir()
+            conn = sqlite3.connect(self.state_db, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _state_conn(self) -> sqlite3.Connection:
+        """
+        Return a connection to an initialised state database.
+        Raises:
+            FileNotFoundError: If the pages table does not exist and there is no JSON state to import.
+        """
+        conn = self._connect()
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'pages'").fetchone():
+            self._import_state_json(conn)
+        return conn
+
+    @staticmethod
+    def _create_pages_table(conn: sqlite3.Connection):
+        """
+        Create the pages table holding one row per page URL.
+        """
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "idx INTEGER PRIMARY KEY, url TEXT NOT NULL UNIQUE, is_fetched INTEGER NOT NULL DEFAULT 0, ts TEXT)"
+        )
+
+    def _import_state_json(self, conn: sqlite3.Connection):
+        """
+        Import the all-pages state JSON written by earlier versions, so in-progress crawls keep their progress.
+        Raises:
+            FileNotFoundError: If there is no JSON state to import either.
+        """
+        state_json_path = self.state_dir / f"{self.website.lower()}_all_pages_state.json"
+        try:
+            with open(state_json_path, "rb") as f:
+                all_pages = orjson.loads(f.read())
+        except FileNotFoundError:
+            raise FileNotFoundError(f"State database not initialised: {self.state_db}. Please run create_full_state_db first.") from None
+        with conn:
+            self._create_pages_table(conn)
+            conn.executemany(
+                "INSERT OR IGNORE INTO pages (idx, url, is_fetched, ts) VALUES (?, ?, ?, ?)",
+                [(idx, entry["url"], int(entry.get("isFetched", False)), entry.get("timestamp")) for idx, entry in enumerate(all_pages)]
+            )
+        print(f"Imported {len(all_pages)} pages from {state_json_path} into {self.state_db}")
 
     def save_state(self):
         """
@@ -94,50 +274,76 @@ class URLsHandler:
             "current_url": self.current_url,
             "timestamp": datetime.now().isoformat()
         }
-        with open(self.state_file, "w", encoding="utf-8") as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)
+        self._ensure_state_dir()
+        # Write a sibling temp file and rename it over the old one, so a crash never leaves a half-written state
+        tmp_file = self.state_file.with_suffix(self.state_file.suffix + ".tmp")
+        tmp_file.write_bytes(orjson.dumps(state))
+        os.replace(tmp_file, self.state_file)
 
     def load_state(self):
         """
         Load the state from the JSON file if it exists, and resume from there.
         """
-        if self.state_file.exists():
-            try:
-                with open(self.state_file, "r", encoding="utf-8") as f:
-                    state = json.load(f)
-                self.current_page_number = state.get("current_page_number", self.current_page_number)
-                self.current_url = state.get("current_url", self.current_url)
-            except Exception as e:
-                print(f"Failed to load state: {e}")
+        self._state_loaded = True
+        try:
+            with open(self.state_file, "rb") as f:
+                state = orjson.loads(f.read())
+            self._current_page_number = state.get("current_page_number", self._current_page_number)
+            self._current_url = state.get("current_url", self._current_url)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Failed to load state: {e}")
 
     def reset_state(self):
         """
         Delete the state file to start from zero.
         """
-        if self.state_file.exists():
-            try:
-                os.remove(self.state_file)
-                print(f"State file {self.state_file} deleted.")
-            except Exception as e:
-                print(f"Failed to delete state file: {e}")
+        try:
+            os.remove(self.state_file)
+            print(f"State file {self.state_file} deleted.")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Failed to delete state file: {e}")
+
+    def _last_page(self, conn: sqlite3.Connection) -> Tuple[int, str]:
+        """
+        Return (idx, url) of the last page in the state database.
+        Cached, since marking pages fetched never changes it; reset when the pages table is rebuilt.
+        Raises:
+            ValueError: If the state database has no pages.
+        """
+        if self._last_page_cache is None:
+            last = conn.execute("SELECT idx, url FROM pages ORDER BY idx DESC LIMIT 1").fetchone()
+            if last is None:
+                raise ValueError(f"State database is empty: {self.state_db}")
+            self._last_page_cache = last
+        return self._last_page_cache
 
     def get_next_page_url(self) -> Tuple[str, bool, int]:
         """
-        Returns the next unfetched page URL from the full state JSON, a boolean indicating if it's the last page, and the index.
+        Returns the next unfetched page URL from the state database, a boolean indicating if it's the last page, and the index.
+        Each call hands out a different page: a cursor shared by all threads using this handler
+        advances past it when it is handed out, not when it is fetched. Once the cursor runs past
+        the end while unfetched pages remain (e.g. pages that failed), it rewinds to the start,
+        so those pages are offered again.
         """
-        import json
-        state_json_path = self.state_dir / f"{self.website.lower()}_all_pages_state.json"
-        if not state_json_path.exists():
-            raise FileNotFoundError(f"Full state JSON not found: {state_json_path}. Please run create_full_state_json first.")
-        with open(state_json_path, "r", encoding="utf-8") as f:
-            all_pages = json.load(f)
-        for idx, entry in enumerate(all_pages):
-            if not entry.get("isFetched", False):
-                url = entry["url"]
-                is_last = (idx == len(all_pages) - 1)
-                return url, is_last, idx
-        # If all are fetched, return last
-        return all_pages[-1]["url"], True, len(all_pages) - 1
+        query = "SELECT idx, url FROM pages WHERE is_fetched = 0 AND idx >= ? ORDER BY idx LIMIT 1"
+        conn = self._state_conn()
+        last_idx, last_url = self._last_page(conn)
+        with self._cursor_lock:
+            row = conn.execute(query, (self._cursor,)).fetchone()
+            if row is None and self._cursor > 0:
+                # Rewind to offer pages that were handed out earlier but never marked fetched
+                self._cursor = 0
+                row = conn.execute(query, (self._cursor,)).fetchone()
+            if row is None:
+                # If all are fetched, return last
+                return last_url, True, last_idx
+            idx, url = row
+            self._cursor = idx + 1
+        return url, idx == last_idx, idx
 
     def get_batched_pages(self, number_of_workers: int = 5) -> List[List[Any]]:
         """
@@ -147,92 +353,142 @@ class URLsHandler:
         Returns:
             List[List[Any]]: List of [url, is_last_page, page_number].
         """
-        batch_list: List[List[Any]] = []
-        batch_size = self.last_page_number // number_of_workers
-        for _ in range(batch_size):
-            url, is_last_url, page_number = self.get_next_page_url()
-            if not is_last_url:
-                batch_list.append([url, is_last_url, page_number])
-            else:
-                break
-        return batch_list
+        # First of the even shares of the unfetched pages, so it matches get_all_batches
+        ranges = self.get_index_ranges(number_of_workers, include_last=False)
+        return self.urls_for(*ranges[0]) if ranges else []
 
     def get_all_batches(self, num_workers: int, batch_size: int = None) -> List[List[Any]]:
         """
         Divide all pages among num_workers, returning a list of batches (one per worker).
-        Each batch is a list of [url, is_last_page, page_number].
+        Each batch holds the unfetched pages of one range from get_index_ranges, as [url, is_last_page, page_number].
+        The last page is left out, as get_next_page_url reports it as the end of the crawl.
         Args:
             num_workers (int): Number of worker batches to create.
-            batch_size (int, optional): Number of URLs per batch. If None, auto-calculate.
+            batch_size (int, optional): Number of unfetched pages per batch. If None, auto-calculate.
         Returns:
             List[List[Any]]: List of batches, each batch is a list of [url, is_last_page, page_number].
         """
-        total_pages = self.last_base_page_number if self.base_link else self.last_page_number
         print("batch_size", batch_size)
+        return [self.urls_for(start, end) for start, end in self.get_index_ranges(num_workers, batch_size, include_last=False)]
+
+    def get_index_ranges(self, num_workers: int, batch_size: int = None, include_last: bool = True) -> List[Tuple[int, int]]:
+        """
+        Split the unfetched pages into at most one contiguous [start, end) index range per worker.
+        Ranges are cut by count of unfetched pages, so already fetched pages on a resumed crawl
+        do not leave some workers with empty ranges.
+        Workers can pass their range to urls_for instead of receiving a list of URLs.
+        Args:
+            num_workers (int): Maximum number of ranges to create.
+            batch_size (int, optional): Unfetched pages per range. If None, ranges differ in size by at most one.
+            include_last (bool): Whether the last page may be part of a range.
+        Returns:
+            List[Tuple[int, int]]: Non-empty (start, end) index ranges in page order.
+        """
+        self.flush_marks()
+        conn = self._state_conn()
+        idxs = [idx for (idx,) in conn.execute("SELECT idx FROM pages WHERE is_fetched = 0 ORDER BY idx")]
+        if not include_last and idxs and idxs[-1] == self._last_page(conn)[0]:
+            # Drop it before splitting so the sizes stay even over the pages actually handed out
+            idxs.pop()
         if batch_size is None:
-            batch_size = total_pages // num_workers + (1 if total_pages % num_workers else 0)
-        batches: List[List[Any]] = []
-        for _ in range(num_workers):
-            batch: List[Any] = []
-            for _ in range(batch_size):
-                url, is_last_url, page_number = self.get_next_page_url()
-                if not is_last_url:
-                    batch.append([url, is_last_url, page_number])
-                else:
-                    break
-            if batch:
-                batches.append(batch)
-        return batches
-
-    def create_full_state_json(self, output_file: str = None):
-        """
-        Create a JSON file with metadata for every page URL: url, timestamp, isFetched.
-        Sets isFetched=False and timestamp=None for all pages initially.
-        """
-        if output_file is None:
-            output_file = self.state_dir / f"{self.website.lower()}_all_pages_state.json"
-        page_urls = []
+            positions = split_evenly(len(idxs), num_workers)
+        else:
+            positions = [(start, min(start + batch_size, len(idxs))) for start in range(0, len(idxs), batch_size)][:num_workers]
+        return [(idxs[start], idxs[end - 1] + 1) for start, end in positions]
+
+    def urls_for(self, start: int, end: int) -> List[List[Any]]:
+        """
+        Return [url, is_last_page, page_number] for the unfetched pages with index in [start, end).
+        """
+        conn = self._state_conn()
+        last_idx, _ = self._last_page(conn)
+        rows = conn.execute("SELECT idx, url FROM pages WHERE is_fetched = 0 AND idx >= ? AND idx < ? ORDER BY idx", (start, end))
+        return [[url, idx == last_idx, idx] for idx, url in rows]
+
+    def create_full_state_db(self):
+        """
+        Create the state database with one row per page URL: idx, url, is_fetched, ts.
+        Sets is_fetched=0 and ts=NULL for all pages initially, replacing any previous state.
+        """
         if self.base_link:
-            for i in range(0, self.last_base_page_number + 1, self.increment):
-                page_urls.append(self.base_url.format(page_number=i))
+            prefix, suffix = self._url_prefix, self._url_suffix
+            page_urls = [f"{prefix}{i}{suffix}" for i in range(0, self.last_base_page_number + 1, self.increment)]
         else:
-            for i in range(len(self.df)):
-                page_urls.append(self.df["@id"].iloc[i])
-        meta_data = []
-        for url in page_urls:
-            meta_data.append({
-                "url": url,
-                "timestamp": None,
-                "isFetched": False
-            })
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(meta_data, f, ensure_ascii=False, indent=2)
-        print(f"Full state JSON created at {output_file}")
-
-    def mark_url_fetched(self, url, state_json_path=None):
-        """
-        Mark a URL as fetched (isFetched=True, set timestamp) in the state JSON file, using a file lock for multiprocessing safety.
-        """
-        if state_json_path is None:
-            state_json_path = self.state_dir / f"{self.website.lower()}_all_pages_state.json"
-        lock_path = str(state_json_path) + ".lock"
-        with FileLock(lock_path):
-            with open(state_json_path, "r", encoding="utf-8") as f:
-                all_pages = json.load(f)
-            for entry in all_pages:
-                if entry["url"] == url:
-                    entry["isFetched"] = True
-                    entry["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%S")
-                    break
-            with open(state_json_path, "w", encoding="utf-8") as f:
-                json.dump(all_pages, f, ensure_ascii=False, indent=2)
-
-    def get_unfetched_urls(self, state_json_path=None):
-        """
-        Return a list of all unfetched URLs from the state JSON file.
-        """
-        if state_json_path is None:
-            state_json_path = self.state_dir / f"{self.website.lower()}_all_pages_state.json"
-        with open(state_json_path, "r", encoding="utf-8") as f:
-            all_pages = json.load(f)
-        return [entry["url"] for entry in all_pages if not entry.get("isFetched", False)]
\ No newline at end of file
+            page_urls = self.ids
+        conn = self._connect()
+        with conn:
+            conn.execute("DROP TABLE IF EXISTS pages")
+            self._create_pages_table(conn)
+            conn.executemany("INSERT OR IGNORE INTO pages (idx, url) VALUES (?, ?)", enumerate(page_urls))
+        self._last_page_cache = None
+        self._cursor = 0
+        print(f"Full state database created at {self.state_db}")
+
+    def mark_url_fetched(self, url):
+        """
+        Mark a URL as fetched (is_fetched=1, set ts).
+        Marks are buffered and written to the state database once mark_batch_size of them are pending.
+        """
+        self.mark_urls_fetched([url])
+
+    def mark_urls_fetched(self, urls: List[str]):
+        """
+        Mark several URLs as fetched with a single buffer update.
+        Marks are written to the state database once mark_batch_size of them are pending.
+        """
+        ts = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with self._pending_marks_lock:
+            self._pending_marks.extend((url, ts) for url in urls)
+            if len(self._pending_marks) < self.mark_batch_size:
+                return
+        self.flush_marks()
+
+    def add_flush_hook(self, hook: Callable[[], None]):
+        """
+        Register a callable run before buffered marks are written, e.g. to flush a metadata log
+        so no page is marked fetched before its metadata is on disk.
+        """
+        with self._pending_marks_lock:
+            self._flush_hooks.append(hook)
+
+    def remove_flush_hook(self, hook: Callable[[], None]):
+        """
+        Unregister a callable added with add_flush_hook.
+        """
+        with self._pending_marks_lock:
+            if hook in self._flush_hooks:
+                self._flush_hooks.remove(hook)
+
+    def flush_marks(self):
+        """
+        Write all buffered fetched marks to the state database in a single transaction.
+        Flush hooks run first, so anything they write reaches disk before the marks do.
+        """
+        with self._pending_marks_lock:
+            pending, self._pending_marks = self._pending_marks, []
+            hooks = list(self._flush_hooks)
+        if not pending:
+            return
+        for hook in hooks:
+            try:
+                hook()
+            except ValueError:
+                pass  # Its file was closed, which flushed it already
+        try:
+            conn = self._state_conn()
+            with conn:
+                conn.executemany("UPDATE pages SET is_fetched = 1, ts = ? WHERE url = ?", [(ts, url) for url, ts in pending])
+        except Exception:
+            # Put the marks back so a failed write (e.g. a lock timeout) can be retried by the next flush
+            with self._pending_marks_lock:
+                self._pending_marks[:0] = pending
+            raise
+
+    def get_unfetched_urls(self) -> List[Tuple[int, str]]:
+        """
+        Return (idx, url) for all unfetched pages in the state database, in page order.
+        idx is the page's stable index in the state database, used as its page number.
+        Buffered marks are flushed first so fetched pages are not handed out again.
+        """
+        self.flush_marks()
+        return self._state_conn().execute("SELECT idx, url FROM pages WHERE is_fetched = 0 ORDER BY idx").fetchall()